@@ -1,3 +1,6 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 import numpy as np
 
@@ -34,7 +37,8 @@ MONTH_LABELS = [
     "Jul-24", "Aug-24", "Sep-24", "Oct-24", "Nov-24", "Dec-24"
 ]
 
-month_to_label = dict(zip(MONTH_COLS, MONTH_LABELS))
+# Month labels in the same order as MONTH_COLS
+month_arr = np.array(MONTH_LABELS)
 
 # Categories needed in questions
 ITEMS_OF_INTEREST = [
@@ -45,194 +49,270 @@ ITEMS_OF_INTEREST = [
     "All-items excluding food and energy"
 ]
 
-# ------------------------------------------------
-# 1. Combine the 11 data frames into one
-#    Columns: Item, Month, Jurisdiction, CPI
-# ------------------------------------------------
-
-frames = []
-
-for jurisdiction, filename in cpi_order:
-    temp = pd.read_csv(filename)
-
-    #   - Item order as in the CSV
-    #   - Month order as in MONTH_COLS
-    temp_long = temp.melt(
-        id_vars="Item",
-        value_vars=MONTH_COLS,
-        var_name="MonthRaw",
-        value_name="CPI"
+# Axis labels of the CPI cube: cube[jurisdiction, item, month]
+# (jurisdictions as in cpi_order, items sorted like a pivot's columns)
+JUR_LABELS = np.array([jurisdiction for jurisdiction, _ in cpi_order])
+ITEM_LABELS = np.array(sorted(ITEMS_OF_INTEREST))
+
+JUR_INDEX = {label: i for i, label in enumerate(JUR_LABELS)}
+ITEM_INDEX = {label: i for i, label in enumerate(ITEM_LABELS)}
+MONTH_INDEX = {label: i for i, label in enumerate(MONTH_LABELS)}
+
+
+def load_cpi(filename):
+    """
+    Reads one CPI CSV (Item + month columns).
+    A Feather copy is saved next to the CSV and reused on later runs
+    as long as it is newer than the CSV.
+    """
+    cache = filename + ".feather"
+    if os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(filename):
+        return pd.read_feather(cache)
+
+    df = pd.read_csv(
+        filename,
+        usecols=["Item"] + MONTH_COLS,
+        dtype={c: np.float64 for c in MONTH_COLS}
     )
+    # Write to a temporary file first and move it into place, so an
+    # interrupted run never leaves a truncated cache that looks up to date
+    tmp = f"{cache}.{os.getpid()}.tmp"
+    try:
+        df.to_feather(tmp)
+        os.replace(tmp, cache)
+    except (ImportError, OSError):
+        # pyarrow is not installed or the folder is read-only, so just
+        # skip the cache and use the parsed CSV
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return df
 
-    temp_long["Jurisdiction"] = jurisdiction
-    temp_long["Month"] = temp_long["MonthRaw"].map(month_to_label)
-    temp_long = temp_long.drop(columns=["MonthRaw"])
-    frames.append(temp_long)
-
-cpi_df = pd.concat(frames, ignore_index=True)
-cpi_df = cpi_df[["Item", "Month", "Jurisdiction", "CPI"]]
-
-# Q1:
-# Canada, All-items / Food / Shelter for Jan-24
-print("=== First 12 lines of combined CPI data ===")
-print(cpi_df.head(12))
-print()
-
-# ------------------------------------------------
-# 2 & 3. Month-to-month % change and averages
-# ------------------------------------------------
-
-# Month-to-month percentage change (order within each group
-# is already Jan→Dec because of the melt above)
-cpi_df["MoM_pct"] = (
-    cpi_df
-    .groupby(["Jurisdiction", "Item"])["CPI"]
-    .pct_change() * 100
-)
-
-target_items = [
-    "Food",
-    "Shelter",
-    "Services",
-    "All-items excluding food and energy",
-    "All-items"
-]
-
-avg_mom = (
-    cpi_df[cpi_df["Item"].isin(target_items)]
-    .groupby(["Jurisdiction", "Item"])["MoM_pct"]
-    .mean()
-    .reset_index()
-)
-
-avg_mom["Avg_MoM_pct_change"] = avg_mom["MoM_pct"].round(1)
-avg_mom = avg_mom.drop(columns=["MoM_pct"])
-
-print("=== Average month-to-month % change in CPI (2024) ===")
-avg_table = avg_mom.pivot(
-    index="Jurisdiction",
-    columns="Item",
-    values="Avg_MoM_pct_change"
-)
-print(avg_table)
-print()
-
-# ------------------------------------------------
-# 4. Province with highest average change
-# ------------------------------------------------
-
-avg_no_canada = avg_mom[avg_mom["Jurisdiction"] != "Canada"]
-idx_max = avg_no_canada.groupby("Item")["Avg_MoM_pct_change"].idxmax()
-highest_avg_change = avg_no_canada.loc[idx_max].reset_index(drop=True)
-
-print("=== Province with highest average monthly change in each category ===")
-print(highest_avg_change)
-print()
 
 # ------------------------------------------------
-# 5. Equivalent salary to $100,000 in Ontario
-#    using All-items CPI, Dec 2024
+# 1. Combine the 11 data frames into one
+#    Columns: Item, Month, Jurisdiction, CPI
 # ------------------------------------------------
 
-dec_all_items = cpi_df[
-    (cpi_df["Item"] == "All-items") &
-    (cpi_df["Month"] == "Dec-24")
-]
+def build_cpi_df():
+    """
+    Combines the 11 CPI files into one long data frame.
+    Rows come in blocks of 12 (Jan→Dec) per (Jurisdiction, Item).
+    """
+    item_parts = []
+    month_parts = []
+    jurisdiction_parts = []
+    cpi_parts = []
+
+    # Read the files in parallel (pandas' CSV parser releases the GIL);
+    # map() keeps the results in cpi_order
+    filenames = [filename for _, filename in cpi_order]
+    with ThreadPoolExecutor(max_workers=min(len(filenames), os.cpu_count() or 1)) as ex:
+        tables = list(ex.map(load_cpi, filenames))
+
+    for (jurisdiction, _), temp in zip(cpi_order, tables):
+        n = len(temp)
+
+        # Row-major ravel: for each Item (order as in the CSV),
+        # its 12 months in the order of MONTH_COLS
+        cpi_parts.append(temp[MONTH_COLS].to_numpy().ravel(order="C"))
+        item_parts.append(np.repeat(temp["Item"].to_numpy(), 12))
+        month_parts.append(np.tile(month_arr, n))
+        jurisdiction_parts.append(np.full(n * 12, jurisdiction))
+
+    cpi_df = pd.DataFrame({
+        "Item": np.concatenate(item_parts),
+        "Month": np.concatenate(month_parts),
+        "Jurisdiction": np.concatenate(jurisdiction_parts),
+        "CPI": np.concatenate(cpi_parts),
+    })
+
+    # Few distinct labels, so store them as categoricals (small integer
+    # codes instead of one Python string per row)
+    for col in ["Item", "Jurisdiction"]:
+        cpi_df[col] = cpi_df[col].astype("category")
+    cpi_df["Month"] = cpi_df["Month"].astype(
+        pd.CategoricalDtype(MONTH_LABELS, ordered=True)
+    )
 
-ontario_cpi_dec = float(
-    dec_all_items.loc[dec_all_items["Jurisdiction"] == "ON", "CPI"]
-)
+    return cpi_df
+
+
+def build_cube(block_values, juris_per_row, items_per_row):
+    """
+    Lays out a (blocks, 12) array as cube[jurisdiction, item, month]
+    for ITEMS_OF_INTEREST, placing each block with JUR_INDEX / ITEM_INDEX
+    (months keep the Jan→Dec column order of the blocks).
+    Missing (jurisdiction, item) pairs stay NaN.
+    """
+    keep = np.isin(items_per_row, ITEM_LABELS)
+    cube = np.full((len(JUR_LABELS), len(ITEM_LABELS), 12), np.nan)
+    cube[
+        [JUR_INDEX[jurisdiction] for jurisdiction in juris_per_row[keep]],
+        [ITEM_INDEX[item] for item in items_per_row[keep]]
+    ] = block_values[keep]
+    return cube
+
+
+def main():
+    cpi_df = build_cpi_df()
+
+    # Q1:
+    # Canada, All-items for Jan-24 to Dec-24
+    print("=== First 12 lines of combined CPI data ===")
+    print(cpi_df.head(12))
+    print()
+
+    # ------------------------------------------------
+    # 2 & 3. Month-to-month % change and averages
+    # ------------------------------------------------
+
+    # Month-to-month percentage change. cpi_df is built as contiguous
+    # Jan→Dec blocks of 12 rows per (Jurisdiction, Item), so reshaping
+    # gives one row per group and one column per month.
+    cpi_mat = cpi_df["CPI"].to_numpy().reshape(-1, 12)
+
+    mom = np.empty_like(cpi_mat)
+    mom[:, 0] = np.nan
+    mom[:, 1:] = (cpi_mat[:, 1:] / cpi_mat[:, :-1] - 1.0) * 100.0
+
+    # One (Jurisdiction, Item) key per 12-month block, i.e. per row of mom.
+    # CPI and MoM % are laid out once as cubes and shared by Q3-Q8.
+    juris_per_row = cpi_df["Jurisdiction"].iloc[::12].to_numpy()
+    items_per_row = cpi_df["Item"].iloc[::12].to_numpy()
+    cpi_cube = build_cube(cpi_mat, juris_per_row, items_per_row)
+    mom_cube = build_cube(mom, juris_per_row, items_per_row)
+
+    # Average of each Feb→Dec change, as a jurisdictions x items matrix
+    avg_matrix = np.nanmean(mom_cube[:, :, 1:], axis=2).round(1)
+
+    print("=== Average month-to-month % change in CPI (2024) ===")
+    avg_table = pd.DataFrame(
+        avg_matrix,
+        index=pd.Index(JUR_LABELS, name="Jurisdiction"),
+        columns=pd.Index(ITEM_LABELS, name="Item")
+    ).sort_index()
+    print(avg_table)
+    print()
+
+    # ------------------------------------------------
+    # 4. Province with highest average change
+    # ------------------------------------------------
+
+    # Drop Canada's row, then take the best province per item (column).
+    # Ties go to the first province in order, like idxmax.
+    canada_idx = JUR_INDEX["Canada"]
+    prov_names = np.delete(JUR_LABELS, canada_idx)
+    prov_mat = np.delete(avg_matrix, canada_idx, axis=0)
+    best = np.nanargmax(prov_mat, axis=0)
+
+    highest_avg_change = pd.DataFrame({
+        "Jurisdiction": prov_names[best],
+        "Item": ITEM_LABELS,
+        "Avg_MoM_pct_change": prov_mat[best, np.arange(len(ITEM_LABELS))],
+    })
+
+    print("=== Province with highest average monthly change in each category ===")
+    print(highest_avg_change)
+    print()
+
+    # ------------------------------------------------
+    # 5. Equivalent salary to $100,000 in Ontario
+    #    using All-items CPI, Dec 2024
+    # ------------------------------------------------
+
+    dec_vals = pd.Series(
+        cpi_cube[:, ITEM_INDEX["All-items"], MONTH_INDEX["Dec-24"]],
+        index=pd.Index(JUR_LABELS, name="Jurisdiction"),
+        name="CPI"
+    )
+    equiv_salary = (100000 * dec_vals / dec_vals.loc["ON"]).round(2)
 
-equiv_salary_df = dec_all_items[["Jurisdiction", "CPI"]].copy()
-equiv_salary_df["EquivalentSalary"] = (
-    100000 * equiv_salary_df["CPI"] / ontario_cpi_dec
-).round(2)
+    print("=== Equivalent salary to $100,000 in Ontario (Dec-24, All-items CPI) ===")
+    print(equiv_salary.rename("EquivalentSalary").reset_index())
+    print()
 
-print("=== Equivalent salary to $100,000 in Ontario (Dec-24, All-items CPI) ===")
-print(equiv_salary_df[["Jurisdiction", "EquivalentSalary"]])
-print()
+    # ------------------------------------------------
+    # 6. Minimum wages: nominal and real
+    # ------------------------------------------------
 
-# ------------------------------------------------
-# 6. Minimum wages: nominal and real
-# ------------------------------------------------
+    min_wage_df = pd.read_csv("MinimumWages.csv")
 
-min_wage_df = pd.read_csv("MinimumWages.csv")
-
-# Adjust names to something easy
-min_wage_df = min_wage_df.rename(
-    columns={"Province": "Jurisdiction", "Minimum Wage": "MinWage"}
-)
-min_wage_df["MinWage"] = min_wage_df["MinWage"].astype(float)
-
-# Nominal highest/lowest
-max_nominal = min_wage_df.loc[min_wage_df["MinWage"].idxmax()]
-min_nominal = min_wage_df.loc[min_wage_df["MinWage"].idxmin()]
-
-print("=== Minimum wages (nominal) ===")
-print(
-    f"Highest nominal minimum wage: {max_nominal['Jurisdiction']} "
-    f"(${max_nominal['MinWage']:.2f})"
-)
-print(
-    f"Lowest nominal minimum wage:  {min_nominal['Jurisdiction']} "
-    f"(${min_nominal['MinWage']:.2f})"
-)
-print()
-
-# Real minimum wage using Dec-24 All-items CPI
-dec_all_items_short = dec_all_items[["Jurisdiction", "CPI"]]
-min_merge = pd.merge(min_wage_df, dec_all_items_short, on="Jurisdiction")
-
-# Real wage index (bigger = more purchasing power)
-min_merge["RealMinWage"] = min_merge["MinWage"] / (min_merge["CPI"] / 100.0)
-
-min_merge_sorted = min_merge.sort_values("RealMinWage", ascending=False)
-
-print("=== Minimum wages (real, using Dec-24 All-items CPI) ===")
-print(min_merge_sorted[["Jurisdiction", "MinWage", "CPI", "RealMinWage"]])
-print()
-print(
-    "Province with highest REAL minimum wage:",
-    min_merge_sorted.iloc[0]["Jurisdiction"]
-)
-print()
-
-# ------------------------------------------------
-# 7. Annual change in CPI for services (Jan → Dec)
-# ------------------------------------------------
+    # Adjust names to something easy
+    min_wage_df = min_wage_df.rename(
+        columns={"Province": "Jurisdiction", "Minimum Wage": "MinWage"}
+    )
+    min_wage_df["MinWage"] = min_wage_df["MinWage"].astype(float)
 
-services_df = cpi_df[cpi_df["Item"] == "Services"].copy()
+    # Nominal highest/lowest
+    max_nominal = min_wage_df.loc[min_wage_df["MinWage"].idxmax()]
+    min_nominal = min_wage_df.loc[min_wage_df["MinWage"].idxmin()]
 
-# Putting months in rows and jurisdictions in index
-services_pivot = services_df.pivot(
-    index="Jurisdiction",
-    columns="Month",
-    values="CPI"
-)
+    print("=== Minimum wages (nominal) ===")
+    print(
+        f"Highest nominal minimum wage: {max_nominal['Jurisdiction']} "
+        f"(${max_nominal['MinWage']:.2f})"
+    )
+    print(
+        f"Lowest nominal minimum wage:  {min_nominal['Jurisdiction']} "
+        f"(${min_nominal['MinWage']:.2f})"
+    )
+    print()
 
-# Annual % change from Jan-24 to Dec-24
-annual_change_services = (
-    (services_pivot["Dec-24"] - services_pivot["Jan-24"])
-    / services_pivot["Jan-24"] * 100
-).round(1)
+    # Real minimum wage using Dec-24 All-items CPI
+    # (dec_vals is the Dec-24 All-items CPI by jurisdiction from Q5)
+    min_wage_df["CPI"] = min_wage_df["Jurisdiction"].map(dec_vals)
 
-print("=== Annual change in CPI for services (Jan-24 to Dec-24) ===")
-for jurisdiction, change in annual_change_services.items():
-    print(f"{jurisdiction}: {change:.1f}%")
-print()
+    # Keep only jurisdictions that have a CPI (same rows as an inner join)
+    min_wage_df = min_wage_df.dropna(subset=["CPI"])
 
-# ------------------------------------------------
-# 8. Region with highest services inflation
-# ------------------------------------------------
+    # Real wage index (bigger = more purchasing power)
+    min_wage_df["RealMinWage"] = min_wage_df["MinWage"] / (min_wage_df["CPI"] / 100.0)
 
-max_services_region = annual_change_services.idxmax()
-max_services_value = annual_change_services.loc[max_services_region]
+    min_wage_df.sort_values("RealMinWage", ascending=False, inplace=True)
 
-print("=== Region with highest inflation in services ===")
-print(
-    f"{max_services_region} with an annual change of "
-    f"{max_services_value:.1f}% in services CPI."
-)
-print()
+    print("=== Minimum wages (real, using Dec-24 All-items CPI) ===")
+    print(min_wage_df[["Jurisdiction", "MinWage", "CPI", "RealMinWage"]])
+    print()
+    print(
+        "Province with highest REAL minimum wage:",
+        min_wage_df.iloc[0]["Jurisdiction"]
+    )
+    print()
+
+    # ------------------------------------------------
+    # 7. Annual change in CPI for services (Jan → Dec)
+    # ------------------------------------------------
+
+    services = cpi_cube[:, ITEM_INDEX["Services"], :]
+    jan_services = services[:, MONTH_INDEX["Jan-24"]]
+    dec_services = services[:, MONTH_INDEX["Dec-24"]]
+
+    # Annual % change from Jan-24 to Dec-24 (sorted by jurisdiction,
+    # same order as the old pivot output)
+    annual_change_services = pd.Series(
+        ((dec_services - jan_services) / jan_services * 100).round(1),
+        index=JUR_LABELS
+    ).sort_index()
+
+    print("=== Annual change in CPI for services (Jan-24 to Dec-24) ===")
+    for jurisdiction, change in annual_change_services.items():
+        print(f"{jurisdiction}: {change:.1f}%")
+    print()
+
+    # ------------------------------------------------
+    # 8. Region with highest services inflation
+    # ------------------------------------------------
+
+    max_services_region = annual_change_services.idxmax()
+    max_services_value = annual_change_services.loc[max_services_region]
+
+    print("=== Region with highest inflation in services ===")
+    print(
+        f"{max_services_region} with an annual change of "
+        f"{max_services_value:.1f}% in services CPI."
+    )
+    print()
 
 
+if __name__ == "__main__":
+    main()
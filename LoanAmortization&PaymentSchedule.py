@@ -1,7 +1,69 @@
 import numpy as np
 import pandas as pd
+import matplotlib
+matplotlib.use("Agg") # Non-interactive backend, the chart is only saved to a PNG
 import matplotlib.pyplot as plt
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional, only used for penny_rounding=True
+    njit = None
+
+
+def _amortize(principal, pmt, rate, n):
+    """
+    Penny-rounded amortization loop used by generate_schedule(penny_rounding=True).
+    Returns the Beginning Balance, Interest Paid, Principal Paid and Ending Balance
+    arrays, plus the number of periods used (the loan can be paid off early).
+    """
+    begin = np.empty(n)
+    interest = np.empty(n)
+    prin = np.empty(n)
+    end = np.empty(n)
+
+    bal = principal
+    for i in range(n):
+        # Calculate Interest for the period: I = Beginning Balance * Periodic Rate
+        I_Pmt = round(bal * rate, 2)
+
+        # Calculate Principal Paid: Principal = Payment - Interest
+        Principal_Pmt = round(pmt - I_Pmt, 2)
+
+        # Check for final payment adjustment
+        if bal - Principal_Pmt < 0:
+            Principal_Pmt = bal # Pay off remaining balance
+            Ending_Bal = 0.0
+        else:
+            Ending_Bal = round(bal - Principal_Pmt, 2)
+
+        begin[i] = round(bal, 2)
+        interest[i] = I_Pmt
+        prin[i] = Principal_Pmt
+        end[i] = Ending_Bal
+
+        # Update the balance for the next period
+        bal = Ending_Bal
+        if bal <= 0.0:
+            return begin, interest, prin, end, i + 1
+
+    return begin, interest, prin, end, n
+
+
+# Without numba, _amortize still runs as plain Python on the preallocated arrays
+if njit is not None:
+    _amortize = njit(cache=True)(_amortize)
+
+def _annuity_factor(rate, periods):
+    """
+    ((1 + r)^n - 1) / r for arrays of periodic rates and periods.
+    Any periodic rate that is exactly 0 uses the r -> 0 limit, n.
+    """
+    rate, periods = np.broadcast_arrays(np.asarray(rate, dtype=np.float64),
+                                        np.asarray(periods, dtype=np.float64))
+    return np.divide((1 + rate)**periods - 1, rate,
+                     out=periods.copy(), where=(rate != 0))
+
+
 # The class name is "Mortgage Payment Calculator" 
 class MortgagePaymentCalculator:
     """
@@ -48,41 +110,34 @@ class MortgagePaymentCalculator:
         # Assuming semi-annual compounding for payment calculation as per Canadian standard
         n_months = self.amortization_period * 12
 
-        # Defined the PVM formula as an internal function 
+        # Periodic rate and number of payments for the six options, in order:
+        # 1. Monthly (12 a year), 2. Semi-Monthly (24), 3. Bi-Weekly (26),
+        # 4. Weekly (52), 5. Rapid Bi-Weekly and 6. Rapid Weekly (both start
+        # from the Monthly Payment)
+        rates = np.array([self.monthlyinterestrate, self.semimonthlyinterestrate,
+                          self.biweeklyinterestrate, self.weeklyinterestrate,
+                          self.monthlyinterestrate, self.monthlyinterestrate])
+        periods = np.array([n_months, n_months * 2, n_months * (26/12),
+                            n_months * (52/12), n_months, n_months])
+
+        # PVM formula for all six at once
         # P = Principal * (r * (1 + r)^n) / ((1 + r)^n - 1)
-        def calculate_payment(periodic_rate, periods):
-            if periodic_rate == 0:
-                return self.principal / periods
-            return (self.principal * (periodic_rate * (1 + periodic_rate)**periods)) / \
-                   ((1 + periodic_rate)**periods - 1)
-
-        # 1. Monthly Payment (12 times a year)
-        MonthlyPayment = calculate_payment(self.monthlyinterestrate, n_months)
-        
-        # 2. Semi-Monthly Payment (24 times a year)
-        SemiMonthlyPayment = calculate_payment(self.semimonthlyinterestrate, n_months * 2)
+        #   = Principal * (1 + r)^n / annuity factor (Principal / n when r = 0)
+        payments = self.principal * (1 + rates)**periods / _annuity_factor(rates, periods)
 
-        # 3. Bi-Weekly Payment (26 times a year)
-        BiweeklyPayment = calculate_payment(self.biweeklyinterestrate, n_months * (26/12)) 
-        
-        # 4. Weekly Payment (52 times a year)
-        WeeklyPayment = calculate_payment(self.weeklyinterestrate, n_months * (52/12)) 
-        
-        # 5. Rapid Bi-Weekly Payment (Monthly Payment / 2) 
-        RapidBiweeklyPayment = MonthlyPayment / 2
-        
-        # 6. Rapid Weekly Payment (Monthly Payment / 4) - 
-        RapidWeeklyPayment = MonthlyPayment / 4
-        
-        return (MonthlyPayment, SemiMonthlyPayment, BiweeklyPayment, 
-                WeeklyPayment, RapidBiweeklyPayment, RapidWeeklyPayment)
+        # 5. Rapid Bi-Weekly Payment (Monthly Payment / 2)
+        payments[4] /= 2
+
+        # 6. Rapid Weekly Payment (Monthly Payment / 4)
+        payments[5] /= 4
 
+        return tuple(payments.tolist())
 
-    def generate_schedule(self):
+
+    def _schedule_inputs(self):
         """
-        (Part A New Functionality)
-        Generates the loan payment schedule for the six options up to the loan term.
-        Returns a dictionary of six Pandas DataFrames.
+        Payment option names plus the payment, periodic rate and number of
+        payments in the term for each option (shared by the schedule and plot).
         """
         
         # Generates calculated payments
@@ -91,8 +146,6 @@ class MortgagePaymentCalculator:
                          'Weekly', 'Rapid Bi-Weekly', 'Rapid Weekly']
         payment_info = dict(zip(payment_names, payments))
         
-        schedules = {} # Dictionary to hold the 6 DataFrames
-        
         # Define the payment frequencies (payments per year)
         frequencies = {'Monthly': 12, 'Semi-Monthly': 24, 'Bi-Weekly': 26, 
                        'Weekly': 52, 'Rapid Bi-Weekly': 26, 'Rapid Weekly': 52}
@@ -110,64 +163,127 @@ class MortgagePaymentCalculator:
         total_term_payments = {}
         for name, freq in frequencies.items():
             total_term_payments[name] = self.term * freq
-            
+
+        return payment_names, payment_info, rates, total_term_payments
+
+    def _closed_form_schedules(self):
+        """
+        Closed-form schedule arrays for the six options, cut at the payoff period.
+        Shared by generate_schedule() and balance_curves() so the Excel rows and
+        the plotted curves always end at the same period.
+        Returns a dictionary of (Period, Beginning Balance, Interest Paid,
+        Principal Paid, Ending Balance) arrays.
+        """
+        
+        payment_names, payment_info, rates, total_term_payments = self._schedule_inputs()
+        
+        # Closed-form balances for all six options in one NumPy expression,
+        # one row per option: B(k) = P0*(1+r)^k - Pmt*((1+r)^k - 1)/r
+        # growth_prev holds (1+r)^(k-1), the growth up to the start of period k
+        rate_vec = np.array([rates[name] for name in payment_names])[:, None]
+        pmt_vec = np.array([payment_info[name] for name in payment_names])[:, None]
+        max_periods = max(total_term_payments.values())
+        k_all = np.arange(1, max_periods + 1, dtype=np.float64)[None, :]
+        growth_prev = (1 + rate_vec)**(k_all - 1)
+        annuity_factor = _annuity_factor(rate_vec, k_all - 1)
+
+        beginning_all = self.principal * growth_prev - pmt_vec * annuity_factor
+        interest_all = beginning_all * rate_vec
+        principal_all = pmt_vec - interest_all
+        ending_all = beginning_all - principal_all
+
+        arrays = {}
+        for row, name in enumerate(payment_names):
+            # Each option's row is sliced to its own number of payments
+            n = total_term_payments[name]
+            k = k_all[0, :n]
+            beginning_balance = beginning_all[row, :n]
+            interest = interest_all[row, :n]
+            principal_paid = principal_all[row, :n]
+            ending_balance = ending_all[row, :n]
+
+            # Check for final payment adjustment (stop once the loan is paid off).
+            # At the payoff period the closed form leaves float residue such as
+            # 1e-9 instead of 0, so anything that rounds to $0.00 counts as paid.
+            paid_off = np.flatnonzero(ending_balance < 0.005)
+            if paid_off.size > 0:
+                last = paid_off[0] + 1
+                k = k[:last]
+                beginning_balance = beginning_balance[:last]
+                interest = interest[:last]
+                principal_paid = principal_paid[:last].copy()
+                ending_balance = ending_balance[:last].copy()
+                principal_paid[-1] = beginning_balance[-1] # Pay off remaining balance
+                ending_balance[-1] = 0.0
+
+            arrays[name] = (k, beginning_balance, interest, principal_paid, ending_balance)
+
+        return arrays
+
+    def generate_schedule(self, penny_rounding=False):
+        """
+        (Part A New Functionality)
+        Generates the loan payment schedule for the six options up to the loan term.
+        By default the balances come from the closed-form amortization formula.
+        With penny_rounding=True every period is rounded to the cent before the
+        next one is calculated (uses numba when it is installed).
+        Returns a dictionary of six Pandas DataFrames.
+        """
+        
+        payment_names, payment_info, rates, total_term_payments = self._schedule_inputs()
+        
+        schedules = {} # Dictionary to hold the 6 DataFrames
+        
+        if not penny_rounding:
+            closed_form = self._closed_form_schedules()
+
         # --- Schedule Generation Loop ---
         for name in payment_names:
             Pmt = payment_info[name] # Periodic payment amount
             Term_Periods = total_term_payments[name] # Total payments in the term
             Rate = rates[name] # Periodic interest rate
 
-            # Initialize lists for the DataFrame columns
-            period = []
-            beginning_balance = []
-            interest = []
-            principal_paid = []
-            ending_balance = []
-            
-            current_balance = self.principal
-            
-            for i in range(1, Term_Periods + 1):
-                # Using NumPy to ensure efficient array like calculations 
-                # Calculate Interest for the period: I = Beginning Balance * Periodic Rate
-                I_Pmt = np.round(current_balance * Rate, 2)
-                
-                # Calculate Principal Paid: Principal = Payment - Interest
-                Principal_Pmt = np.round(Pmt - I_Pmt, 2)
-                
-                # Check for final payment adjustment
-                if current_balance - Principal_Pmt < 0:
-                    Principal_Pmt = current_balance # Pay off remaining balance
-                    Ending_Bal = 0.0
-                else:
-                    Ending_Bal = np.round(current_balance - Principal_Pmt, 2)
-                
-                # Store the results for the period
-                period.append(i)
-                beginning_balance.append(np.round(current_balance, 2))
-                interest.append(I_Pmt)
-                principal_paid.append(Principal_Pmt)
-                ending_balance.append(Ending_Bal)
-                
-                # Update the balance for the next period
-                current_balance = Ending_Bal
-                
-                if current_balance <= 0.0:
-                    break
-            
+            if penny_rounding:
+                # Jitted with numba when available, otherwise plain Python
+                (beginning_balance, interest, principal_paid,
+                 ending_balance, n_paid) = _amortize(self.principal, Pmt, Rate, Term_Periods)
+                k = np.arange(1, n_paid + 1)
+                beginning_balance = beginning_balance[:n_paid]
+                interest = interest[:n_paid]
+                principal_paid = principal_paid[:n_paid]
+                ending_balance = ending_balance[:n_paid]
+
+            else:
+                (k, beginning_balance, interest,
+                 principal_paid, ending_balance) = closed_form[name]
+
             # Create a Pandas DataFrame for the current payment schedule
+            # Period fits in int32; dollar amounts stay float64 because float32
+            # cannot hold every cent above about $167,000 (2**24 cents)
             df = pd.DataFrame({
-                'Period': period,
-                'Beginning Balance': beginning_balance,
-                'Payment': [np.round(Pmt, 2)] * len(period), # Keep the payment constant
-                'Interest Paid': interest,
-                'Principal Paid': principal_paid,
-                'Ending Balance': ending_balance
+                'Period': k.astype(np.int32),
+                'Beginning Balance': np.round(beginning_balance, 2),
+                'Payment': np.full(len(k), np.round(Pmt, 2)), # Keep the payment constant
+                'Interest Paid': np.round(interest, 2),
+                'Principal Paid': np.round(principal_paid, 2),
+                'Ending Balance': np.round(ending_balance, 2)
             })
             
             schedules[name] = df
             
         return schedules
 
+    def balance_curves(self):
+        """
+        Ending Balance over the term for the six options, taken from the same
+        closed-form arrays as generate_schedule() but without building the
+        DataFrames. Used for the plot.
+        Returns a dictionary of (Period array, Ending Balance array) pairs.
+        """
+        
+        return {name: (k.astype(np.int32), np.round(ending_balance, 2))
+                for name, (k, _, _, _, ending_balance) in self._closed_form_schedules().items()}
+
 # --- Script Execution ---
 
 def main():
@@ -194,43 +310,58 @@ def main():
     # 2. Exporting all six DataFrames to a single Excel file (Part A: Correct Excel)
     excel_filename = 'Loan_Amortization_Schedules.xlsx'
     
-    # Using Pandas ExcelWriter to write to multiple sheets
-    with pd.ExcelWriter(excel_filename, engine='xlsxwriter') as writer:
+    # Using Pandas ExcelWriter to write to multiple sheets.
+    # constant_memory makes xlsxwriter flush each row to disk instead of
+    # keeping every cell in RAM, but then rows must be written in order,
+    # so each sheet is written row by row (to_excel writes column by column).
+    with pd.ExcelWriter(excel_filename, engine='xlsxwriter',
+                        engine_kwargs={'options': {'constant_memory': True}}) as writer:
+        header_format = writer.book.add_format({'bold': True, 'border': 1, 'align': 'center'})
         for name, df in loan_schedules.items():
             # Save each DataFrame to a separate worksheet labelled appropriately
-            df.to_excel(writer, sheet_name=name, index=False)
+            worksheet = writer.book.add_worksheet(name)
             
             # (Formatting for Excel)
-            worksheet = writer.sheets[name]
-            # Setting column widths for better readability in Excel
+            # Setting column widths for better readability in Excel (before any rows)
             worksheet.set_column('A:F', 18) 
             
+            # Each column is converted to plain Python values once with tolist(),
+            # then zipped back into rows (write_column can't be used here since
+            # it would go back to rows that constant_memory already flushed)
+            worksheet.write_row(0, 0, list(df.columns), header_format)
+            columns = [df[col].to_numpy().tolist() for col in df.columns]
+            for row, values in enumerate(zip(*columns), start=1):
+                worksheet.write_row(row, 0, values)
+            
     print(f"Excel file saved: {excel_filename}")
     
     # 3. Generate a single graph depicting loan balance decline (Part A: Functional Code & Matplotlib)
-    plt.figure(figsize=(12, 7)) # Setted plot size
+    fig, ax = plt.subplots(figsize=(12, 7), dpi=80) # Setted plot size
     
-    # Plot Ending Balance over periods for all six schedules
-    for name, df in loan_schedules.items():
-        # The x-axis should represent time, which is the Period column
-        plt.plot(df['Period'], df['Ending Balance'], label=f'{name} ({df.iloc[-1]["Period"]} payments)')
+    # Plot Ending Balance over periods for all six schedules.
+    # Only Period and Ending Balance are needed, so the curves come from
+    # balance_curves() instead of the full schedules.
+    # Long schedules (e.g. weekly) are thinned to about 500 points, which looks
+    # the same on the chart; the last point is always kept.
+    for name, (p, b) in mortgage_calc.balance_curves().items():
+        # The x-axis should represent time, which is the Period
+        step = max(1, len(p) // 500)
+        keep = np.r_[0:len(p):step, len(p) - 1]
+        ax.plot(p[keep], b[keep], label=f'{name} ({len(p)} payments)')
 
     # --- Plot Formatting ---
-    plt.title(f'Loan Balance Decline Over Term (Rate: {interestrate}%, Principal: ${principal:,.2f})')
-    plt.xlabel(f'Payment Period (over a {term}-year Term)')
-    plt.ylabel('Ending Loan Balance ($)')
-    plt.grid(True, linestyle='--', alpha=0.7)
+    ax.set_title(f'Loan Balance Decline Over Term (Rate: {interestrate}%, Principal: ${principal:,.2f})')
+    ax.set_xlabel(f'Payment Period (over a {term}-year Term)')
+    ax.set_ylabel('Ending Loan Balance ($)')
+    ax.grid(True, linestyle='--', alpha=0.7)
     
     # We six payment options & must create six data frames.
     # Using the savefig(...) function within Matplotlib to save the graph as a PNG file.
-    plt.legend(title="Payment Options", loc='upper right')
-    
-    # Set y-axis to start from 0 for better visualization of decline
-    plt.ylim 
+    ax.legend(title="Payment Options", loc='upper right')
     
     png_filename = 'Loan_Balance_Decline.png'
-    plt.savefig(png_filename)
-    plt.close() 
+    fig.savefig(png_filename, dpi=80, bbox_inches=None)
+    plt.close(fig) 
     
     print(f"✅ PNG file saved: {png_filename}")
 